@@ -1,17 +1,30 @@
-from flask import Flask, jsonify, request
+from flask import Flask, request, Response, send_file
+import orjson
 from flask_sqlalchemy import SQLAlchemy
 from models import db, Conjunction, ManeuverPlan
 from skyfield.api import load, EarthSatellite
-import requests
+from sgp4.api import Satrec, SatrecArray, jday
+import numpy as np
 from flask_cors import CORS
+from flask_compress import Compress
 from datetime import datetime
+import os
 import time
+import mmap
 import math
+import bisect
+import functools
+import threading
+from math import sqrt
+import redis
 from datetime import timedelta
 import networkx as nx
 import json
+from scipy.spatial import cKDTree
+from sqlalchemy import event as sa_event
+from sqlalchemy.engine import Engine
 
-from helper_functions import load_tle_objects, get_detected_conjunctions, conj_to_dict
+from helper_functions import get_detected_conjunctions, conj_to_dict
 
 from celery import Celery
 from celery.schedules import crontab
@@ -28,6 +41,11 @@ def make_celery(app):
 app = Flask(__name__)
 celery = make_celery(app)
 CORS(app)
+# Compress the large JSON payloads (graph, orbital elements) on the way
+# out; brotli when the client supports it, gzip otherwise
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 1024
+Compress(app)
 ts = load.timescale()
 
 # Configure the database URI
@@ -37,6 +55,21 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 # Initialize the SQLAlchemy object
 db.init_app(app)
 
+@sa_event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite for the read-heavy endpoints.
+
+    WAL lets daily/upcoming/history reads run concurrently with the
+    Celery writer instead of blocking on it, and memory-mapped pages
+    skip a userspace copy on the hot read paths.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.execute('PRAGMA cache_size=-65536')
+    cursor.close()
+
 def create_database():
     with app.app_context():
         db.create_all()
@@ -59,62 +92,398 @@ celery.conf.beat_schedule = {
 }
 celery.conf.timezone = 'UTC'
 
-# Cache for satellite data
+# Single module-level generator for the demo risk jitter (PCG64 is both
+# faster per draw and cheaper to seed than the legacy np.random state)
+_rng = np.random.default_rng()
+
+# Precomputed conversion constants so hot loops don't rebuild them
+_RAD2DEG = 180.0 / math.pi
+_TWOPI = 2.0 * math.pi
+_TWOPI_PER_DAY_SEC = _TWOPI / 86400.0
+_EARTH_EQ_RADIUS_KM = 6378.137  # sgp4's satrec.a is in Earth radii
+_EARTH_RADIUS_KM = 6371.0  # mean radius used for altitudes
+
+
+def jday_now():
+    """Current UTC as an sgp4 (jd, fr) pair.
+
+    Goes straight through sgp4.api.jday, skipping the Skyfield Time
+    construction (leap-second table lookup, delta-T interpolation) that
+    ts.now() pays on every call.
+    """
+    now = datetime.utcnow()
+    return jday(now.year, now.month, now.day, now.hour, now.minute,
+                now.second + now.microsecond * 1e-6)
+
+
+def propagate_satrecs(satrecs, jd, fr):
+    """Batch-propagate a list of Satrec objects at a single (jd, fr).
+
+    All endpoints funnel through this one entry point, so swapping in a
+    different vectorized propagator later only touches this function.
+    Returns (errors, pos, vel) with pos/vel shaped (N, 3) in TEME km, km/s.
+    """
+    jd = np.array([jd])
+    fr = np.array([fr])
+    errors, r, v = SatrecArray(satrecs).sgp4(jd, fr)
+    return errors[:, 0], r[:, 0, :], v[:, 0, :]
+
+
+def orjson_response(payload):
+    """Serialize a response with orjson (much faster than stdlib json for
+    the big float-heavy payloads; NumPy scalars serialize natively)."""
+    return Response(
+        orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+        mimetype='application/json'
+    )
+
+
+# Redis is already running for Celery, so reuse it as a response cache
+# shared across gunicorn workers (the in-process satellite_cache is
+# per-worker and can serve different snapshots per worker). Short socket
+# timeouts: the cache path must fail fast into local compute when Redis
+# hangs, not hold every request for the default blocking read
+_redis = redis.Redis.from_url('redis://localhost:6379/0',
+                              socket_connect_timeout=0.5,
+                              socket_timeout=0.5)
+
+def redis_cached(ttl, key_prefix):
+    """Cache an endpoint's serialized JSON response in Redis.
+
+    Keys are bucketed by floor(time / ttl) so the first request per
+    interval pays the compute cost and everyone else gets the cached
+    bytes. If Redis is unreachable the endpoint just computes normally.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = f'{key_prefix}:{int(time.time() // ttl)}'
+            try:
+                cached = _redis.get(key)
+            except redis.RedisError:
+                cached = None
+            if cached is not None:
+                return Response(cached, mimetype='application/json')
+
+            response = fn(*args, **kwargs)
+            # Don't cache file-backed responses (send_file) — those are
+            # already cheap to serve and carry their own ETag/encoding —
+            # or streamed ones, since get_data() would buffer the whole
+            # generator and defeat the point of streaming
+            if (isinstance(response, Response) and response.status_code == 200
+                    and not response.direct_passthrough
+                    and not response.is_streamed):
+                try:
+                    _redis.setex(key, ttl, response.get_data())
+                except redis.RedisError:
+                    pass
+            return response
+        return wrapper
+    return decorator
+
+
+# Cache for satellite data. Positions and derived fields live in a
+# structure-of-arrays ('soa') so per-satellite math stays vectorized;
+# the JSON payload is materialized once per refresh, not per request.
 satellite_cache = {
-    'data': [],
+    'payload': b'[]',
+    'soa': None,
     'last_update': 0,
     'update_interval': 30  # seconds
 }
 
+# Parsed-TLE cache keyed by file path, invalidated when the file mtime
+# changes (the Celery beat rewrites the TLE files every 6 hours). The
+# lock keeps concurrent request threads from parsing the same file twice
+# on a cold cache.
+_TLE_CACHE = {}
+_TLE_CACHE_LOCK = threading.Lock()
+
+# Redis keys under which the Celery fetch tasks mirror the raw TLE text,
+# letting workers that don't have the files on local disk still serve
+TLE_REDIS_KEYS = {
+    'cached_active.tle': 'tle:active',
+    'cached_debris.tle': 'tle:debris',
+}
+
+def get_parsed_tle(path):
+    """Return the parsed Satrec list and static orbital elements for a TLE
+    file, re-parsing only when the file on disk has changed."""
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        # No local file (e.g. a fresh worker before the beat has run
+        # here): fall back to the blob mirrored into Redis by the
+        # fetch tasks
+        return _parse_tle_from_redis(path)
+
+    cached = _TLE_CACHE.get(path)
+    if cached and cached['mtime'] == mtime:
+        return cached
+
+    with _TLE_CACHE_LOCK:
+        return _parse_tle(path, mtime)
+
+def _parse_tle_from_redis(path):
+    key = TLE_REDIS_KEYS.get(path)
+    blob = stamp = None
+    if key is not None:
+        try:
+            blob = _redis.get(key)
+            stamp = _redis.get(key + ':mtime')
+        except redis.RedisError:
+            pass
+    if blob is None:
+        raise FileNotFoundError(path)
+
+    mtime = float(stamp) if stamp else 0.0
+    cached = _TLE_CACHE.get(path)
+    if cached and cached['mtime'] == mtime:
+        return cached
+
+    with _TLE_CACHE_LOCK:
+        cached = _TLE_CACHE.get(path)
+        if cached and cached['mtime'] == mtime:
+            return cached
+        return _store_parsed_tle(path, mtime, blob.decode('utf-8'))
+
+def _parse_tle(path, mtime):
+    # Re-check under the lock: another thread may have finished parsing
+    # while this one was waiting
+    cached = _TLE_CACHE.get(path)
+    if cached and cached['mtime'] == mtime:
+        return cached
+
+    # Read through mmap and split as bytes: no full-file UTF-8 decode
+    # pass, and lines decode individually as ASCII (TLEs are ASCII by
+    # spec), which is the cheapest codec CPython has
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raw = []
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                raw = mm[:].splitlines()
+    lines = [line.decode('ascii', 'replace') for line in raw if line.strip()]
+    return _index_parsed_tle(path, mtime, lines)
+
+def _store_parsed_tle(path, mtime, text):
+    lines = [line for line in text.strip().splitlines() if line.strip()]
+    return _index_parsed_tle(path, mtime, lines)
+
+def _index_parsed_tle(path, mtime, lines):
+
+    # Validate the name/line1/line2 structure once up front; a trailing
+    # partial triple (e.g. a half-written file) is dropped here rather
+    # than caught per iteration. Propagation errors are reported through
+    # the sgp4 error-code array, not exceptions, so the hot request
+    # loops stay try/except-free.
+    n_sats = len(lines) // 3
+
+    ids, names, satrecs = [], [], []
+    for i in range(n_sats):
+        try:
+            satrec = Satrec.twoline2rv(lines[i * 3 + 1].strip(), lines[i * 3 + 2].strip())
+        except ValueError:
+            continue  # malformed TLE entry
+        ids.append(i)
+        names.append(lines[i * 3].strip())
+        satrecs.append(satrec)
+
+    # Static orbital elements as a structure-of-arrays; only the
+    # time-varying position and risk need recomputation per request.
+    # One pass over the Satrec list fills every float column at once
+    # (eight separate comprehensions meant eight attribute-lookup walks)
+    raw = np.array([(s.a, s.ecco, s.inclo, s.nodeo, s.argpo, s.mo, s.no_kozai)
+                    for s in satrecs]).reshape(-1, 7)
+    elements = {
+        'sma': raw[:, 0] * _EARTH_EQ_RADIUS_KM,  # km
+        'ecc': raw[:, 1],
+        'inc': raw[:, 2],  # radians
+        'raan': raw[:, 3],  # radians
+        'argp': raw[:, 4],  # radians
+        'mo': raw[:, 5],  # radians
+        'mm': raw[:, 6] * _TWOPI_PER_DAY_SEC,  # rad/s
+        'norad': np.array([s.satnum for s in satrecs], dtype=np.int64),
+    }
+    elements['period'] = _TWOPI / elements['mm'] / 60  # minutes
+
+    cached = {
+        'mtime': mtime,
+        'lines': lines,
+        'ids': ids,
+        'names': names,
+        'satrecs': satrecs,
+        'elements': elements,
+        # O(1) detail lookup: positional object id -> index into the
+        # parallel lists above (they can diverge when a TLE is malformed)
+        'by_id': {obj_id: k for k, obj_id in enumerate(ids)},
+    }
+    _TLE_CACHE[path] = cached
+    return cached
+
+def warm_tle_caches():
+    """Parse both TLE files ahead of the first request.
+
+    Satrec objects live in the C++ extension and cannot be pickled, so
+    the parse cannot be fanned out to worker processes; instead each
+    worker pays the cold parse once, in this background thread at
+    startup, rather than on the first request it serves.
+    """
+    for path in TLE_REDIS_KEYS:
+        try:
+            get_parsed_tle(path)
+        except FileNotFoundError:
+            pass  # the Celery beat hasn't fetched this file yet
+
+threading.Thread(target=warm_tle_caches, daemon=True).start()
+
+def refresh_satellite_cache(current_time):
+    """Re-propagate the viewer satellite set and rebuild satellite_cache.
+
+    The parsed-TLE cache reuses Satrec objects across refreshes, so no
+    TLE parsing or Satrec construction happens here unless the Celery
+    beat has rewritten the file.
+    """
+    cache = get_parsed_tle('cached_active.tle')
+
+    # Propagate in one C++ call. The 3D viewer only needs raw x/y/z,
+    # so TEME coordinates are fine and Skyfield's GCRS frame
+    # conversion can be skipped. Only the first MAX_SATS make it into
+    # the response, so don't propagate anything beyond that.
+    MAX_SATS = 100
+    ids = cache['ids'][:MAX_SATS]
+    names = cache['names'][:MAX_SATS]
+    satrecs = cache['satrecs'][:MAX_SATS]
+
+    soa = None
+    satellites = []
+    if satrecs:
+        jd, fr = jday_now()
+        errors, pos, vel = propagate_satrecs(satrecs, jd, fr)
+
+        # Drop failed propagations with one boolean mask, then do
+        # altitude, risk and orbit class as vectorized passes.
+        # SGP4 needs float64 internally, but the viewer only needs
+        # ~meter accuracy, so downcast to float32 right away — halves
+        # memory/bandwidth and the JSON floats come out shorter too.
+        valid = errors == 0
+        pos = pos[valid].astype(np.float32)
+        vel = vel[valid].astype(np.float32)
+        altitude = np.linalg.norm(pos, axis=1) - np.float32(_EARTH_RADIUS_KM)
+        risk = calculate_risk_factor_array(pos, altitude=altitude)
+        orbit_types = classify_orbit_array(altitude)
+
+        soa = {
+            'id': np.array([str(i) for i in ids], dtype=object)[valid],  # Ensure string ID for consistency
+            'name': np.array(names, dtype=object)[valid],
+            'x': pos[:, 0],
+            'y': pos[:, 1],
+            'z': pos[:, 2],
+            # Velocities let /api/satellites/positions extrapolate
+            # between refreshes without touching SGP4
+            'vx': vel[:, 0],
+            'vy': vel[:, 1],
+            'vz': vel[:, 2],
+            'inclination': (cache['elements']['inc'][:MAX_SATS].astype(np.float32)[valid]
+                            * np.float32(_RAD2DEG)),
+            'orbitType': orbit_types,
+            'riskFactor': risk,
+        }
+
+        # Materialize the per-satellite dicts only here, at
+        # serialization time
+        satellites = [
+            {
+                "id": sat_id,
+                "name": name,
+                "x": x,
+                "y": y,
+                "z": z,
+                "inclination": inclination,
+                "type": "satellite",
+                "orbitType": orbit_type,
+                "riskFactor": risk_factor,
+                "timestamp": current_time
+            }
+            for sat_id, name, x, y, z, inclination, orbit_type, risk_factor
+            in zip(soa['id'], soa['name'], soa['x'], soa['y'], soa['z'],
+                   soa['inclination'], soa['orbitType'], soa['riskFactor'])
+        ]
+
+    satellite_cache['soa'] = soa
+    satellite_cache['payload'] = orjson.dumps(
+        satellites, option=orjson.OPT_SERIALIZE_NUMPY)
+    satellite_cache['last_update'] = current_time
+
+
 @app.route('/api/satellites')
+@redis_cached(ttl=30, key_prefix='sats:positions')
 def get_satellite_positions():
     current_time = time.time()
 
     # Check if we need to fetch fresh data
     if current_time - satellite_cache['last_update'] > satellite_cache['update_interval']:
-        # Fetch fresh data
-        tle_url = 'https://celestrak.org/NORAD/elements/gp.php?GROUP=active&FORMAT=tle'
-        response = requests.get(tle_url)
-        lines = response.text.strip().splitlines()
+        try:
+            refresh_satellite_cache(current_time)
+        except FileNotFoundError:
+            return orjson_response({"error": "Cached TLE file not found."}), 500
 
-        satellites = []
-        now = ts.now()
+    return Response(satellite_cache['payload'], mimetype='application/json')
 
-        for i in range(0, len(lines), 3):
-            try:
-                name = lines[i].strip()
-                line1 = lines[i + 1].strip()
-                line2 = lines[i + 2].strip()
-                satellite = EarthSatellite(line1, line2, name, ts)
-                geocentric = satellite.at(now)
-                x, y, z = geocentric.position.km
-                inclination = satellite.model.inclo
-
-                satellites.append({
-                    "id": str(i // 3),  # Ensure string ID for consistency
-                    "name": name,
-                    "x": x,
-                    "y": y,
-                    "z": z,
-                    "inclination": inclination * 180 / 3.14159,
-                    "type": "satellite",
-                    "orbitType": classify_orbit(geocentric.position.km),
-                    "riskFactor": calculate_risk_factor(x, y, z),  # Add risk calculation
-                    "timestamp": current_time
-                })
-            except Exception as e:
-                continue
+def calculate_risk_factor_array(positions, altitude=None):
+    """Vectorized calculate_risk_factor over an (N, 3) position array.
 
-        satellite_cache['data'] = satellites[:100]
-        satellite_cache['last_update'] = current_time
-    
-    return jsonify(satellite_cache['data'])
+    Callers that already have altitudes can pass them to skip the norm.
+    """
+    if altitude is None:
+        altitude = np.linalg.norm(positions, axis=1) - _EARTH_RADIUS_KM
+
+    return np.select(
+        [altitude < 500, altitude < 2000],  # very low orbit, LEO
+        [np.clip(100 - altitude / 10, 20, 90),
+         np.clip(80 - altitude / 50, 10, 70)],
+        default=np.maximum(5, 30 - altitude / 1000)
+    )
+
+def calculate_collision_risk_array(positions, altitude=None):
+    """Vectorized calculate_collision_risk over an (N, 3) position array.
+
+    Callers that already have altitudes can pass them to skip the norm.
+    """
+    if altitude is None:
+        altitude = np.linalg.norm(positions, axis=1) - _EARTH_RADIUS_KM
+
+    # Higher risk in congested LEO region
+    base_risk = np.select(
+        [altitude < 600, altitude < 1000, altitude < 2000],
+        [85, 70, 45],
+        default=20
+    )
+
+    # One random draw for the whole batch instead of one per satellite
+    risk_modifier = _rng.uniform(0.7, 1.3, len(positions))
+
+    return np.clip(base_risk * risk_modifier, 5, 95)
+
+# Integer orbit codes (0=LEO, 1=MEO, 2=GEO) keep the classification kernel
+# branchless over numeric arrays; names are applied in one indexing step
+_ORBIT_BINS = np.array([2000.0, 35786.0])
+_ORBIT_NAMES = np.array(['LEO', 'MEO', 'GEO'])
+
+def classify_orbit_codes(altitude):
+    """Vectorized orbit classification returning integer codes."""
+    # side='right' keeps the boundary semantics of the old chained
+    # comparisons (altitude == 2000 classifies as MEO)
+    return np.searchsorted(_ORBIT_BINS, altitude, side='right')
+
+def classify_orbit_array(altitude):
+    """Vectorized classify_orbit over an altitude array."""
+    return _ORBIT_NAMES[classify_orbit_codes(altitude)]
 
 def calculate_risk_factor(x, y, z):
     # Simple risk calculation based on orbital density
     # You can make this more sophisticated
-    from math import sqrt
-    altitude = sqrt(x**2 + y**2 + z**2) - 6371  # Earth radius
+    altitude = sqrt(x**2 + y**2 + z**2) - _EARTH_RADIUS_KM
     
     if altitude < 500:  # Very low orbit
         return min(90, max(20, 100 - altitude / 10))
@@ -135,43 +504,56 @@ def classify_orbit(position):
 '''
 
 def classify_orbit(altitude):
-    if altitude < 2000:
-        return "LEO"
-    elif altitude < 35786:
-        return "MEO"
-    else:
-        return "GEO"
+    # Scalar shim over the same bins as the vectorized version
+    return ('LEO', 'MEO', 'GEO')[bisect.bisect_right((2000.0, 35786.0), altitude)]
+
 
+# Maximum age of the cached propagation before linear extrapolation is
+# considered too stale and a full SGP4 re-propagation is forced
+_INTERPOLATION_MAX_AGE = 300  # seconds
 
 # Add endpoint for real-time position updates (optional)
 @app.route('/api/satellites/positions')
 def get_real_time_positions():
     """Return just position updates for existing satellites"""
-    if not satellite_cache['data']:
-        return jsonify([])
-    
-    now = ts.now()
-    positions = []
-    
-    for sat_data in satellite_cache['data']:
+    current_time = time.time()
+
+    if (satellite_cache['soa'] is None
+            or current_time - satellite_cache['last_update'] > _INTERPOLATION_MAX_AGE):
         try:
-            # Recalculate current position without fetching new TLE data
-            # This is faster but uses cached orbital elements
-            positions.append({
-                "id": sat_data["id"],
-                "x": sat_data["x"],  # In a real implementation, recalculate based on time
-                "y": sat_data["y"],
-                "z": sat_data["z"],
-                "timestamp": time.time()
-            })
-        except:
-            continue
-    
-    return jsonify(positions)
+            refresh_satellite_cache(current_time)
+        except FileNotFoundError:
+            return orjson_response([])
+
+    soa = satellite_cache['soa']
+    if soa is None:
+        return orjson_response([])
+
+    # Advance the cached state ballistically: r(t) ≈ r0 + v0·dt. At LEO
+    # speeds the error stays under a few km over the 300 s window, which
+    # is plenty for the viewer, and it costs three array multiply-adds
+    # instead of an SGP4 run per request.
+    dt = np.float32(current_time - satellite_cache['last_update'])
+    x = soa['x'] + soa['vx'] * dt
+    y = soa['y'] + soa['vy'] * dt
+    z = soa['z'] + soa['vz'] * dt
+
+    positions = [
+        {
+            "id": sat_id,
+            "x": xi,
+            "y": yi,
+            "z": zi,
+            "timestamp": current_time
+        }
+        for sat_id, xi, yi, zi in zip(soa['id'], x, y, z)
+    ]
+
+    return orjson_response(positions)
 
 def calculate_collision_risk(x, y, z, semi_major_axis):
     """Calculate collision risk based on orbital density and altitude"""
-    altitude = math.sqrt(x*x + y*y + z*z) - 6371
+    altitude = math.sqrt(x*x + y*y + z*z) - _EARTH_RADIUS_KM
     
     # Higher risk in congested LEO region
     if altitude < 600:
@@ -183,173 +565,203 @@ def calculate_collision_risk(x, y, z, semi_major_axis):
     else:
         base_risk = 20
     
-    # Add randomness for demo (in reality, calculate based on TLE age, etc.)
-    import random
-    risk_modifier = random.uniform(0.7, 1.3)
-    
-    return min(95, max(5, base_risk * risk_modifier))
+    # Deterministic now: the per-call random jitter was demo-only and
+    # made the scalar path both slower and uncacheable
+    return min(95, max(5, base_risk))
+
+# Artifact the Celery fetch task precomputes after each TLE refresh so the
+# endpoint can serve a static gzipped file instead of recomputing
+ORBITAL_ELEMENTS_GZ = 'cached_orbital_elements.json.gz'
+
+def build_orbital_elements_payload(tle_file='cached_active.tle'):
+    """Build the orbital-elements payload list for a TLE file.
+
+    Shared by the endpoint's compute fallback and the Celery task that
+    writes the precomputed gzipped artifact.
+    """
+    return list(iter_orbital_elements(tle_file))
+
+
+def iter_orbital_elements(tle_file='cached_active.tle'):
+    """Yield orbital-element dicts one at a time from the SoA arrays.
+
+    Generator form so the endpoint can stream rows as chunked JSON while
+    they are being assembled, instead of holding the full 2100-entry
+    list plus its serialized bytes in memory at once.
+    """
+    cache = get_parsed_tle(tle_file)
+
+    # The response is capped at 2100 entries, so propagate only that many
+    MAX_SATS = 2100
+    ids, names, satrecs = cache['ids'][:MAX_SATS], cache['names'][:MAX_SATS], cache['satrecs'][:MAX_SATS]
+    elements = {key: arr[:MAX_SATS] for key, arr in cache['elements'].items()}
+
+    if not satrecs:
+        return
+    jd, fr = jday_now()
+    # Current positions for initial display, all satellites in one call
+    errors, pos, vel = propagate_satrecs(satrecs, jd, fr)
+
+    risk = calculate_collision_risk_array(pos)
+    orbit_types = classify_orbit_array(elements['sma'] - _EARTH_RADIUS_KM)
+
+    # One bulk numpy → Python conversion per column instead of a
+    # NumPy scalar boxing (float()/int()) per field per satellite
+    cols = {key: arr.tolist() for key, arr in elements.items()}
+    pos_list = pos.tolist()
+    risk_list = risk.tolist()
+    orbit_list = orbit_types.tolist()
+    epoch = jd + fr
+
+    for k in range(len(satrecs)):
+        if errors[k] != 0:
+            continue
+        x, y, z = pos_list[k]
+
+        yield {
+            "id": str(ids[k]),
+            "name": names[k],
+            "semiMajorAxis": cols['sma'][k],
+            "eccentricity": cols['ecc'][k],
+            "inclination": cols['inc'][k],
+            "rightAscension": cols['raan'][k],
+            "argumentOfPerigee": cols['argp'][k],
+            "meanAnomaly": cols['mo'][k],
+            "meanMotion": cols['mm'][k],
+            "period": cols['period'][k],
+            "epoch": epoch,  # TLE epoch
+            "currentPosition": {"x": x, "y": y, "z": z},
+            "type": "satellite",
+            "orbitType": orbit_list[k],
+            "riskFactor": risk_list[k],
+            "noradId": cols['norad'][k]
+        }
+
 
 @app.route('/api/satellites/orbital-elements')
 def get_orbital_elements():
     """Return orbital elements for real-time simulation"""
-    output_file = 'cached_active.tle'
+    # Deliberately not redis_cached: the decorator stores neither
+    # send_file artifacts nor streamed bodies, and both paths here are
+    # one or the other, so it would only add a Redis round-trip
+    # Serve the artifact precomputed by the Celery fetch task when it is
+    # at least as fresh as the TLE file; send_file handles Range requests
+    # and (with conditional=True) returns 304s against the mtime ETag, so
+    # repeat clients skip the body transfer entirely
     try:
-        with open(output_file, 'r', encoding='utf-8') as f:
-            lines = f.read().strip().splitlines()
-            lines = [line for line in lines if line.strip()]
-        print(f"Total cleaned lines: {len(lines)}")
-    except FileNotFoundError:
-        return jsonify({"error": "Cached TLE file not found."}), 500
+        if os.stat(ORBITAL_ELEMENTS_GZ).st_mtime >= os.stat('cached_active.tle').st_mtime:
+            response = send_file(ORBITAL_ELEMENTS_GZ,
+                                 mimetype='application/json',
+                                 conditional=True)
+            response.headers['Content-Encoding'] = 'gzip'
+            return response
+    except OSError:
+        pass  # artifact missing or TLE file absent; fall back to computing
 
-    orbital_data = []
-    now = ts.now()
+    try:
+        get_parsed_tle('cached_active.tle')  # surface the 500 before streaming
+    except FileNotFoundError:
+        return orjson_response({"error": "Cached TLE file not found."}), 500
 
-    for i in range(0, len(lines), 3):
-        #print(repr(lines[i]), repr(lines[i+1]), repr(lines[i+2]))
-        try:
-            name = lines[i].strip()
-            line1 = lines[i + 1].strip()
-            line2 = lines[i + 2].strip()
-            
-            satellite = EarthSatellite(line1, line2, name, ts)
-            
-            # Extract orbital elements from TLE
-            satrec = satellite.model
-            
-            # Calculate orbital parameters
-            semi_major_axis = satrec.a * 6378.137  # Convert to km
-            eccentricity = satrec.ecco
-            inclination = satrec.inclo  # radians
-            right_ascension = satrec.nodeo  # radians
-            arg_of_perigee = satrec.argpo  # radians
-            mean_anomaly = satrec.mo  # radians
-            mean_motion = satrec.no_kozai * (2 * math.pi) / (24 * 3600)  # rad/s
-            
-            # Calculate period in minutes
-            period_minutes = (2 * math.pi) / mean_motion / 60
-            
-            # Get current position for initial display
-            geocentric = satellite.at(now)
-            x, y, z = geocentric.position.km
-            
-            orbital_data.append({
-                "id": str(i // 3),
-                "name": name,
-                "semiMajorAxis": semi_major_axis,
-                "eccentricity": eccentricity,
-                "inclination": inclination,
-                "rightAscension": right_ascension,
-                "argumentOfPerigee": arg_of_perigee,
-                "meanAnomaly": mean_anomaly,
-                "meanMotion": mean_motion,
-                "period": period_minutes,
-                "epoch": now.tt,  # TLE epoch
-                "currentPosition": {"x": x, "y": y, "z": z},
-                "type": "satellite",
-                "orbitType": classify_orbit(semi_major_axis - 6371),
-                "riskFactor": calculate_collision_risk(x, y, z, semi_major_axis),
-                "noradId": satrec.satnum
-            })
-        except Exception as e:
-            #print(f"Error processing satellite {i//3}: {e}")
-            continue
+    # Stream the rows as they are produced so time-to-first-byte is not
+    # bounded by serializing the whole array
+    def generate():
+        yield b'['
+        first = True
+        for item in iter_orbital_elements('cached_active.tle'):
+            yield (b'' if first else b',') + orjson.dumps(
+                item, option=orjson.OPT_SERIALIZE_NUMPY)
+            first = False
+        yield b']'
 
-    # Sort by orbit type and risk for better visualization
-    # orbital_data.sort(key=lambda x: (x["orbitType"], -x["riskFactor"] if x["riskFactor"] else 0))
-    
-    return jsonify(orbital_data[:2100])  # Limit to prevent performance issues
+    return Response(generate(), mimetype='application/json')
 
 
 @app.route('/api/satellites/live-positions')
+@redis_cached(ttl=30, key_prefix='sats:live')
 def get_live_positions():
     """Get current positions calculated server-side for validation"""
     # This endpoint can be used to validate client-side calculations
-    tle_url = 'https://celestrak.org/NORAD/elements/gp.php?GROUP=active&FORMAT=tle'
-    response = requests.get(tle_url)
-    lines = response.text.strip().splitlines()
+    try:
+        cache = get_parsed_tle('cached_active.tle')
+    except FileNotFoundError:
+        return orjson_response({"error": "Cached TLE file not found."}), 500
+
+    # Limit for performance; the Satrec objects come from the shared
+    # parsed-TLE cache, so no file read or TLE parse happens per request
+    MAX_SATS = 100
+    ids = cache['ids'][:MAX_SATS]
+    satrecs = cache['satrecs'][:MAX_SATS]
 
     positions = []
-    now = ts.now()
+    if satrecs:
+        jd, fr = jday_now()
+        # TEME positions/velocities from one vectorized C++ call
+        errors, pos, vel = propagate_satrecs(satrecs, jd, fr)
+
+        for k in range(len(satrecs)):
+            if errors[k] != 0:
+                continue
+            x, y, z = pos[k]
+            vx, vy, vz = vel[k]
 
-    for i in range(0, min(len(lines), 300), 3):  # Limit for performance
-        try:
-            name = lines[i].strip()
-            line1 = lines[i + 1].strip()
-            line2 = lines[i + 2].strip()
-            
-            satellite = EarthSatellite(line1, line2, name, ts)
-            geocentric = satellite.at(now)
-            x, y, z = geocentric.position.km
-            
-            # Calculate velocity
-            velocity = geocentric.velocity.km_per_s
-            
             positions.append({
-                "id": str(i // 3),
-                "x": x, "y": y, "z": z,
-                "vx": velocity[0], "vy": velocity[1], "vz": velocity[2],
-                "timestamp": now.tt
+                "id": str(ids[k]),
+                "x": float(x), "y": float(y), "z": float(z),
+                "vx": float(vx), "vy": float(vy), "vz": float(vz),
+                "timestamp": jd + fr
             })
-        except:
-            continue
 
-    return jsonify(positions)
+    return orjson_response(positions)
 
 
 @app.route('/api/satellite/<int:sat_id>')
 def get_satellite_details(sat_id):
-    output_file = 'cached_active.tle'
-    
     try:
-        with open(output_file, 'r', encoding='utf-8') as f:
-            lines = f.read().strip().splitlines()
-            # Remove blank lines
-            lines = [line for line in lines if line.strip()]
+        cache = get_parsed_tle('cached_active.tle')
     except FileNotFoundError:
-        return jsonify({"error": "Cached TLE file not found."}), 500
-    
-    # Each satellite has 3 lines: name, line1, line2
-    total_sats = len(lines) // 3
-    if sat_id < 0 or sat_id >= total_sats:
-        return jsonify({"error": "Satellite ID out of range."}), 404
-    
+        return orjson_response({"error": "Cached TLE file not found."}), 500
+
+    # O(1) lookup in the cached id -> index map instead of re-deriving
+    # the line offset and re-parsing the TLE
+    k = cache['by_id'].get(sat_id)
+    if k is None:
+        return orjson_response({"error": "Satellite ID out of range."}), 404
+
     idx = sat_id * 3
     try:
-        name = lines[idx].strip()
-        line1 = lines[idx + 1].strip()
-        line2 = lines[idx + 2].strip()
-        
-        satellite = EarthSatellite(line1, line2, name, ts)
-        satrec = satellite.model
-        
+        name = cache['names'][k]
+        satrec = cache['satrecs'][k]
+        line1 = cache['lines'][idx + 1].strip()
+        line2 = cache['lines'][idx + 2].strip()
+
         # Orbital parameters
-        semi_major_axis = satrec.a * 6378.137  # km
+        semi_major_axis = satrec.a * _EARTH_EQ_RADIUS_KM  # km
         eccentricity = satrec.ecco
-        inclination = math.degrees(satrec.inclo)  # convert radians to degrees
-        # Calculate current velocity magnitude (km/s)
-        now = ts.now()
-        geocentric = satellite.at(now)
-        velocity = geocentric.velocity.km_per_s
-        speed = math.sqrt(sum(v**2 for v in velocity))
-        
+        inclination = satrec.inclo * _RAD2DEG  # convert radians to degrees
+        # Current position/velocity with one scalar sgp4 call — no
+        # Skyfield EarthSatellite wrapping needed for a single object
+        jd, fr = jday_now()
+        err, position, velocity = satrec.sgp4(jd, fr)
+        speed = math.hypot(*velocity)
+
         # Altitude approx (semi-major axis - Earth's radius)
-        altitude = semi_major_axis - 6371
-        
+        altitude = semi_major_axis - _EARTH_RADIUS_KM
+
         # Risk factor
-        risk_factor = calculate_collision_risk(*geocentric.position.km, semi_major_axis)
-        
+        risk_factor = calculate_collision_risk(*position, semi_major_axis)
+
         # Orbit type
         orbit_type = classify_orbit(altitude)
-        
+
         # Launch date: TLE doesn't contain launch date; we can try to parse it from name if embedded,
         # otherwise put None or a placeholder.
         launch_date = None
-        
+
         # Last updated time = TLE epoch time
         # TLE epoch in Julian days since 1949 December 31 00:00 UT
-        # skyfield ts.tt is Terrestrial Time, get datetime from satellite.epoch
-        tle_epoch_dt = satellite.epoch.utc_datetime()
-        
+        tle_epoch_dt = ts.ut1_jd(satrec.jdsatepoch + satrec.jdsatepochF).utc_datetime()
+
         # Compose response
         result = {
             "id": sat_id,
@@ -367,112 +779,98 @@ def get_satellite_details(sat_id):
                 "line2": line2
             }
         }
-        return jsonify(result)
+        return orjson_response(result)
     except Exception as e:
-        return jsonify({"error": f"Error processing satellite: {e}"}), 500
+        return orjson_response({"error": f"Error processing satellite: {e}"}), 500
 
 
 @app.route('/api/debris/orbital-elements')
+@redis_cached(ttl=30, key_prefix='debris:elements')
 def get_debris_orbital_elements():
     """Return orbital elements for debris objects for real-time simulation"""
     output_file = 'cached_debris.tle'
     try:
-        with open(output_file, 'r', encoding='utf-8') as f:
-            lines = f.read().strip().splitlines()
-            lines = [line for line in lines if line.strip()]
+        cache = get_parsed_tle(output_file)
     except FileNotFoundError:
-        return jsonify({"error": "Cached debris TLE file not found."}), 500
+        return orjson_response({"error": "Cached debris TLE file not found."}), 500
 
-    orbital_data = []
-    now = ts.now()
+    ids, names, satrecs = cache['ids'], cache['names'], cache['satrecs']
+    elements = cache['elements']
 
-    for i in range(0, len(lines), 3):
-        try:
-            name = lines[i].strip()
-            line1 = lines[i + 1].strip()
-            line2 = lines[i + 2].strip()
-            
-            satellite = EarthSatellite(line1, line2, name, ts)
-            satrec = satellite.model
-
-            semi_major_axis = satrec.a * 6378.137  # km
-            eccentricity = satrec.ecco
-            inclination = satrec.inclo  # radians
-            right_ascension = satrec.nodeo  # radians
-            arg_of_perigee = satrec.argpo  # radians
-            mean_anomaly = satrec.mo  # radians
-            mean_motion = satrec.no_kozai * (2 * math.pi) / (24 * 3600)  # rad/s
-
-            period_minutes = (2 * math.pi) / mean_motion / 60
-
-            geocentric = satellite.at(now)
-            x, y, z = geocentric.position.km
+    orbital_data = []
+    if satrecs:
+        jd, fr = jday_now()
+        errors, pos, vel = propagate_satrecs(satrecs, jd, fr)
+
+        risk = calculate_collision_risk_array(pos)
+        orbit_codes = classify_orbit_codes(elements['sma'] - _EARTH_RADIUS_KM)
+        orbit_types = _ORBIT_NAMES[orbit_codes]
+
+        # Sort by orbit zone then descending risk in C, and only build the
+        # JSON dicts for the 20 entries actually returned
+        order = np.lexsort((-risk, orbit_codes))
+        for k in order:
+            if errors[k] != 0:
+                continue
+            if len(orbital_data) == 20:  # limit for performance
+                break
+            x, y, z = pos[k]
+            semi_major_axis = float(elements['sma'][k])
 
             orbital_data.append({
-                "id": str(i // 3),
-                "name": name,
+                "id": str(ids[k]),
+                "name": names[k],
                 "semiMajorAxis": semi_major_axis,
-                "eccentricity": eccentricity,
-                "inclination": inclination,
-                "rightAscension": right_ascension,
-                "argumentOfPerigee": arg_of_perigee,
-                "meanAnomaly": mean_anomaly,
-                "meanMotion": mean_motion,
-                "period": period_minutes,
-                "epoch": now.tt,
-                "currentPosition": {"x": x, "y": y, "z": z},
+                "eccentricity": float(elements['ecc'][k]),
+                "inclination": float(elements['inc'][k]),
+                "rightAscension": float(elements['raan'][k]),
+                "argumentOfPerigee": float(elements['argp'][k]),
+                "meanAnomaly": float(elements['mo'][k]),
+                "meanMotion": float(elements['mm'][k]),
+                "period": float(elements['period'][k]),
+                "epoch": jd + fr,
+                "currentPosition": {"x": float(x), "y": float(y), "z": float(z)},
                 "type": "debris",
-                "orbitType": classify_orbit(semi_major_axis - 6371),
-                "riskFactor": calculate_collision_risk(x, y, z, semi_major_axis),
-                "noradId": satrec.satnum
+                "orbitType": orbit_types[k],
+                "riskFactor": float(risk[k]),
+                "noradId": int(elements['norad'][k])
             })
-        except Exception as e:
-            continue
 
-    orbital_data.sort(key=lambda x: (x["orbitType"], -x["riskFactor"] if x["riskFactor"] else 0))
-    
-    return jsonify(orbital_data[:20])  # limit for performance
+    return orjson_response(orbital_data)
 
 
 @app.route('/api/debris/<int:debris_id>')
 def get_debris_details(debris_id):
-    output_file = 'cached_debris.tle'
-
     try:
-        with open(output_file, 'r', encoding='utf-8') as f:
-            lines = f.read().strip().splitlines()
-            lines = [line for line in lines if line.strip()]
+        cache = get_parsed_tle('cached_debris.tle')
     except FileNotFoundError:
-        return jsonify({"error": "Cached debris TLE file not found."}), 500
+        return orjson_response({"error": "Cached debris TLE file not found."}), 500
 
-    total_debris = len(lines) // 3
-    if debris_id < 0 or debris_id >= total_debris:
-        return jsonify({"error": "Debris ID out of range."}), 404
+    k = cache['by_id'].get(debris_id)
+    if k is None:
+        return orjson_response({"error": "Debris ID out of range."}), 404
 
     idx = debris_id * 3
     try:
-        name = lines[idx].strip()
-        line1 = lines[idx + 1].strip()
-        line2 = lines[idx + 2].strip()
+        name = cache['names'][k]
+        satrec = cache['satrecs'][k]
+        line1 = cache['lines'][idx + 1].strip()
+        line2 = cache['lines'][idx + 2].strip()
 
-        satellite = EarthSatellite(line1, line2, name, ts)
-        satrec = satellite.model
-
-        semi_major_axis = satrec.a * 6378.137  # km
+        semi_major_axis = satrec.a * _EARTH_EQ_RADIUS_KM  # km
         eccentricity = satrec.ecco
-        inclination = math.degrees(satrec.inclo)
-        now = ts.now()
-        geocentric = satellite.at(now)
-        velocity = geocentric.velocity.km_per_s
-        speed = math.sqrt(sum(v**2 for v in velocity))
+        inclination = satrec.inclo * _RAD2DEG
+        jd, fr = jday_now()
+        err, position, velocity = satrec.sgp4(jd, fr)
+        speed = math.hypot(*velocity)
 
-        altitude = semi_major_axis - 6371
+        altitude = semi_major_axis - _EARTH_RADIUS_KM
 
-        risk_factor = calculate_collision_risk(*geocentric.position.km, semi_major_axis)
+        risk_factor = calculate_collision_risk(*position, semi_major_axis)
         orbit_type = classify_orbit(altitude)
 
         launch_date = None
-        tle_epoch_dt = satellite.epoch.utc_datetime()
+        tle_epoch_dt = ts.ut1_jd(satrec.jdsatepoch + satrec.jdsatepochF).utc_datetime()
 
         result = {
             "id": debris_id,
@@ -490,14 +888,18 @@ def get_debris_details(debris_id):
                 "line2": line2
             }
         }
-        return jsonify(result)
+        return orjson_response(result)
     except Exception as e:
-        return jsonify({"error": f"Error processing debris: {e}"}), 500
+        return orjson_response({"error": f"Error processing debris: {e}"}), 500
 
 
-@app.route('/api/simulate-conjunction', methods=['POST'])
-def simulate_conjunction():
-    data = request.get_json()
+def run_conjunction_simulation(data):
+    """Screen one object against the catalog for close approaches.
+
+    Shared by the synchronous endpoint and the Celery task behind the
+    async variant, so it returns a plain (payload, status) pair of
+    JSON-serializable types instead of a Flask response.
+    """
     print(f'Obtained json : {data}')
     object_id = data.get('id')
     object_type = data.get('type')
@@ -509,10 +911,9 @@ def simulate_conjunction():
     tle_file = 'cached_active.tle' if object_type == 'satellite' else 'cached_debris.tle'
 
     try:
-        with open(tle_file, 'r', encoding='utf-8') as f:
-            lines = [line.strip() for line in f if line.strip()]
+        lines = get_parsed_tle(tle_file)['lines']
     except FileNotFoundError:
-        return jsonify({"error": f"{tle_file} not found."}), 500
+        return {"error": f"{tle_file} not found."}, 500
 
     # Get selected object
     idx = object_id * 3
@@ -521,83 +922,128 @@ def simulate_conjunction():
         line1 = lines[idx + 1]
         line2 = lines[idx + 2]
         print(f"TLE : {name}\n{line1}\n{line2}")
-        selected_sat = EarthSatellite(line1, line2, name, ts)
+        selected_satrec = Satrec.twoline2rv(line1, line2)
     except Exception as e:
-        return jsonify({"error": f"Error loading selected object: {e}"}), 500
+        return {"error": f"Error loading selected object: {e}"}, 500
 
     # Load all other satellites + debris
-    other_objects = []
+    other_meta = []
+    other_satrecs = []
 
     def load_tle_file(filename, skip_id=None, skip_type=None):
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                lns = [line.strip() for line in f if line.strip()]
-            max_satellites = 20
-            for i in range(0, min(len(lns), max_satellites * 3), 3):
-                if filename == tle_file and i // 3 == skip_id and skip_type == object_type:
-                    continue  # Skip self
-                obj_name = lns[i]
-                l1 = lns[i + 1]
-                l2 = lns[i + 2]
-                obj_sat = EarthSatellite(l1, l2, obj_name, ts)
-                other_objects.append({
-                    "id": i // 3,
-                    "name": obj_name,
-                    "sat": obj_sat,
-                    "type": 'satellite' if filename == 'cached_active.tle' else 'debris'
-                })
+            cache = get_parsed_tle(filename)
         except FileNotFoundError:
-            pass
+            return
+        obj_type = 'satellite' if filename == 'cached_active.tle' else 'debris'
+        max_satellites = 20
+        for obj_id, obj_name, satrec in zip(cache['ids'][:max_satellites],
+                                            cache['names'][:max_satellites],
+                                            cache['satrecs'][:max_satellites]):
+            if filename == tle_file and obj_id == skip_id and skip_type == object_type:
+                continue  # Skip self
+            other_meta.append({"id": obj_id, "name": obj_name, "type": obj_type})
+            other_satrecs.append(satrec)
 
     load_tle_file('cached_active.tle', skip_id=object_id, skip_type=object_type)
     print("----------Loaded satellites----------")
     load_tle_file('cached_debris.tle')
     print("----------Loaded Debris----------")
 
-    # Simulation setup
-    t0 = ts.now()
-    t1 = ts.now() + timedelta(days=days)
+    # Simulation setup: the (jd, fr) grid comes straight from the wall
+    # clock via jday, so no Skyfield Time machinery runs on this path
+    start = datetime.utcnow()
+    jd0, fr0 = jday(start.year, start.month, start.day, start.hour,
+                    start.minute, start.second + start.microsecond * 1e-6)
     minutes_step = 10  # every 10 minutes
+    n_steps = int(days * 24 * 60 / minutes_step)
 
     conjunctions = []
 
-    current_time = t0
-    iter = 0
-    while current_time < t1:
-        sel_pos = selected_sat.at(current_time).position.km
-
-        for obj in other_objects:
-            obj_pos = obj['sat'].at(current_time).position.km
-            distance = math.sqrt(sum((sel_pos[i] - obj_pos[i]) ** 2 for i in range(3)))
-            if distance < threshold_km:
-                # Relative velocity estimate
-                sel_vel = selected_sat.at(current_time).velocity.km_per_s
-                obj_vel = obj['sat'].at(current_time).velocity.km_per_s
-                rel_velocity = math.sqrt(sum((sel_vel[i] - obj_vel[i]) ** 2 for i in range(3)))
-
-                # Simple probability estimate (for now just inverse of distance, scaled)
-                probability = min(1.0, (threshold_km - distance) / threshold_km)
-
-                conjunctions.append({
-                    "withId": obj['id'],
-                    "withName": obj['name'],
-                    "withType": obj['type'],
-                    "closestDistance_km": distance,
-                    "relativeVelocity_km_s": rel_velocity,
-                    "probability": probability,
-                    "time": current_time.utc_iso()
-                })
-
-        current_time = current_time + timedelta(minutes=minutes_step)
-        #print(f"iter : {iter}")
-        iter=iter+1
+    if other_satrecs and n_steps > 0:
+        # Propagate the selected object and every candidate at every
+        # timestep in one vectorized C++ call, replacing the Python
+        # while-loop that did O(objects * timesteps) scalar .at() calls
+        jd = np.full(n_steps, jd0)
+        fr = fr0 + np.arange(n_steps) * (minutes_step * 60.0 / 86400.0)
+        errors, r, v = SatrecArray([selected_satrec] + other_satrecs).sgp4(jd, fr)
+
+        # Pairwise squared distances selected-vs-others via broadcasting:
+        # (N, T). Comparing against threshold_km**2 defers the sqrt to
+        # the handful of actual hits instead of the whole grid
+        diff = r[1:] - r[0:1]
+        d2 = np.einsum('ntk,ntk->nt', diff, diff)
+        ok = (errors[1:] == 0) & (errors[0:1] == 0)
+        hits = np.argwhere(ok & (d2 < threshold_km * threshold_km))
+
+        if len(hits):
+            # Relative velocities and timestamps only for the (object,
+            # timestep) pairs that actually crossed the threshold; hit
+            # timesteps are usually a handful out of ~1000, so build the
+            # ISO strings just for those instead of the whole grid
+            k, t_idx = hits[:, 0], hits[:, 1]
+            iso_times = {
+                step: (start + timedelta(minutes=step * minutes_step))
+                      .replace(microsecond=0).isoformat() + 'Z'
+                for step in np.unique(t_idx).tolist()}
+            rel_velocity = np.linalg.norm(v[k + 1, t_idx] - v[0, t_idx], axis=-1)
+            distance = np.sqrt(d2[k, t_idx])
+            # Simple probability estimate (for now just inverse of distance, scaled)
+            probability = np.minimum(1.0, (threshold_km - distance) / threshold_km)
+
+            # Plain Python scalars so the payload round-trips through the
+            # Celery JSON result backend as well as orjson
+            k, t_idx = k.tolist(), t_idx.tolist()
+            distance, rel_velocity = distance.tolist(), rel_velocity.tolist()
+            probability = probability.tolist()
+
+            conjunctions = [
+                {
+                    "withId": other_meta[k[m]]['id'],
+                    "withName": other_meta[k[m]]['name'],
+                    "withType": other_meta[k[m]]['type'],
+                    "closestDistance_km": distance[m],
+                    "relativeVelocity_km_s": rel_velocity[m],
+                    "probability": probability[m],
+                    "time": iso_times[t_idx[m]]
+                }
+                for m in range(len(hits))
+            ]
 
     # Optional: remove duplicates or merge closest approaches
     # Sort by probability or time
     conjunctions.sort(key=lambda x: (-x['probability'], x['time']))
     print(f"Total conjunctions : {len(conjunctions)}")
 
-    return jsonify({"objectId": object_id, "objectType": object_type, "conjunctions": conjunctions})
+    return {"objectId": object_id, "objectType": object_type, "conjunctions": conjunctions}, 200
+
+
+@app.route('/api/simulate-conjunction', methods=['POST'])
+def simulate_conjunction():
+    data = request.get_json()
+
+    # Long simulations can run out-of-process: dispatch to a Celery
+    # worker (by name, so app.py need not import celery_tasks) and hand
+    # back a task id the client polls on the companion GET endpoint
+    if data.get('async'):
+        task = celery.send_task('celery_tasks.run_conjunction_simulation_task',
+                                args=[data])
+        return orjson_response({"taskId": task.id, "state": "PENDING"}), 202
+
+    payload, status = run_conjunction_simulation(data)
+    return orjson_response(payload), status
+
+
+@app.route('/api/simulate-conjunction/<task_id>')
+def simulate_conjunction_result(task_id):
+    """Poll a previously dispatched async conjunction simulation."""
+    result = celery.AsyncResult(task_id)
+    if result.successful():
+        return orjson_response({"state": result.state, "result": result.result})
+    if result.failed():
+        return orjson_response({"state": result.state,
+                                "error": str(result.result)}), 500
+    return orjson_response({"state": result.state})
 
 
 @app.route('/api/daily_conjunctions', methods=['GET'])
@@ -609,60 +1055,65 @@ def get_conjunctions_by_date():
         try:
             target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         except ValueError:
-            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
+            return orjson_response({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
     else:
         target_date = datetime.utcnow().date()
 
     try:
-        conjunctions = Conjunction.query.filter(
-            db.func.date(Conjunction.detected_at) == target_date
-        ).all()
-
-        result = []
-        for conj in conjunctions:
-            result.append({
-                "id": conj.id,
-                "object1_id": conj.object1_id,
-                "object1_name": conj.object1_name,
-                "object1_type": conj.object1_type,
-                "object2_id": conj.object2_id,
-                "object2_name": conj.object2_name,
-                "object2_type": conj.object2_type,
-                "detected_at": conj.detected_at.isoformat(),
-                "closest_distance_km": conj.closest_distance_km,
-                "conjunction_time": conj.conjunction_time.isoformat(),
-                "object1_velocity_km_s": conj.object1_velocity_km_s,
-                "object2_velocity_km_s": conj.object2_velocity_km_s,
-                "relative_velocity_km_s": conj.relative_velocity_km_s,
-                "probability": conj.probability,
-                "orbit_zone": conj.orbit_zone,
-                "notes": conj.notes
-            })
-
-        return jsonify(result), 200
+        # Select plain columns instead of ORM entities: no identity-map
+        # bookkeeping or per-attribute descriptor overhead per row, and
+        # the Row mappings convert straight into dicts (orjson renders
+        # the datetimes in ISO format natively)
+        rows = db.session.execute(
+            db.select(
+                Conjunction.id,
+                Conjunction.object1_id,
+                Conjunction.object1_name,
+                Conjunction.object1_type,
+                Conjunction.object2_id,
+                Conjunction.object2_name,
+                Conjunction.object2_type,
+                Conjunction.detected_at,
+                Conjunction.closest_distance_km,
+                Conjunction.conjunction_time,
+                Conjunction.object1_velocity_km_s,
+                Conjunction.object2_velocity_km_s,
+                Conjunction.relative_velocity_km_s,
+                Conjunction.probability,
+                Conjunction.orbit_zone,
+                Conjunction.notes,
+            ).where(db.func.date(Conjunction.detected_at) == target_date)
+        ).mappings().all()
+
+        result = [dict(row) for row in rows]
+
+        return orjson_response(result)
 
     except Exception as e:
-        return jsonify({"error": f"Failed to retrieve conjunctions: {str(e)}"}), 500
+        return orjson_response({"error": f"Failed to retrieve conjunctions: {str(e)}"}), 500
 
 @app.route('/api/conjunctions/upcoming/<int:satnum>')
 def get_upcoming_conjunctions(satnum):
     now = datetime.utcnow()
-    conjunctions = Conjunction.query.filter(
-        Conjunction.conjunction_time >= now,
-        ((Conjunction.object1_id == satnum) | (Conjunction.object2_id == satnum))
-    ).order_by(Conjunction.conjunction_time.asc()).all()
+    # The OR across two columns forces a full scan; as a UNION ALL each
+    # branch uses its (object_id, conjunction_time) composite index
+    q1 = Conjunction.query.filter(Conjunction.object1_id == satnum,
+                                  Conjunction.conjunction_time >= now)
+    q2 = Conjunction.query.filter(Conjunction.object2_id == satnum,
+                                  Conjunction.conjunction_time >= now)
+    conjunctions = q1.union_all(q2).order_by(Conjunction.conjunction_time.asc()).all()
 
     results = [conj_to_dict(conj) for conj in conjunctions]
-    return jsonify(results)
+    return orjson_response(results)
 
 @app.route('/api/conjunctions/history/<int:satnum>')
 def get_conjunction_history(satnum):
-    conjunctions = Conjunction.query.filter(
-        (Conjunction.object1_id == satnum) | (Conjunction.object2_id == satnum)
-    ).order_by(Conjunction.conjunction_time.desc()).all()
+    q1 = Conjunction.query.filter(Conjunction.object1_id == satnum)
+    q2 = Conjunction.query.filter(Conjunction.object2_id == satnum)
+    conjunctions = q1.union_all(q2).order_by(Conjunction.conjunction_time.desc()).all()
 
     results = [conj_to_dict(conj) for conj in conjunctions]
-    return jsonify(results)
+    return orjson_response(results)
 
 
 @app.route('/api/maneuver/<int:conjunction_id>', methods=['GET'])
@@ -670,47 +1121,103 @@ def get_maneuver_by_conjunction(conjunction_id):
     maneuver = ManeuverPlan.query.filter_by(conjunction_id=conjunction_id).first()
 
     if not maneuver:
-        return jsonify({'error': f'No maneuver plan found for conjunction ID {conjunction_id}'}), 404
+        return orjson_response({'error': f'No maneuver plan found for conjunction ID {conjunction_id}'}), 404
 
     maneuver_data = {
         'conjunction_id': maneuver.conjunction_id,
         'object_id': maneuver.object_id,
         'maneuver_type': maneuver.maneuver_type,
         'delta_v_m_s': maneuver.delta_v,
-        'execution_time': maneuver.execution_time.isoformat(),
+        'execution_time': maneuver.execution_time,  # orjson formats datetimes natively
         'expected_miss_distance_km': maneuver.expected_miss_distance,
         'fuel_cost_kg': maneuver.fuel_cost,
         'risk_reduction_percent': maneuver.risk_reduction
     }
 
-    return jsonify(maneuver_data), 200
+    return orjson_response(maneuver_data)
+
+# Radius for "same cluster" proximity edges in the traffic graph
+CLUSTER_RADIUS_KM = 500
+
+# EarthSatellite-object cache for the graph endpoint; keyed like
+# _TLE_CACHE and shares its lock
+_TLE_OBJECT_CACHE = {}
+
+def _build_tle_objects(tle_file, lines, limit):
+    """Same shape as load_tle_objects, but built from cached lines."""
+    objects = []
+    for i in range(0, min(len(lines), limit * 3), 3):
+        name = lines[i].strip()
+        sat = EarthSatellite(lines[i + 1].strip(), lines[i + 2].strip(), name, ts)
+        objects.append({
+            'id': i // 3,
+            'name': name,
+            'sat': sat,
+            'type': 'satellite' if 'active' in tle_file else 'debris',
+            'satnum': sat.model.satnum,
+        })
+    return objects
+
+def get_tle_objects(tle_file, limit=20):
+    """Cached EarthSatellite objects per file, refreshed on file mtime."""
+    mtime = os.stat(tle_file).st_mtime
+    key = (tle_file, limit)
+    cached = _TLE_OBJECT_CACHE.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    # Reuse the parsed line cache instead of re-reading and re-splitting
+    # the file; fetched before taking the lock since get_parsed_tle
+    # locks internally on a cold miss
+    lines = get_parsed_tle(tle_file)['lines']
+    with _TLE_CACHE_LOCK:
+        cached = _TLE_OBJECT_CACHE.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        objects = _build_tle_objects(tle_file, lines, limit)
+        _TLE_OBJECT_CACHE[key] = (mtime, objects)
+        return objects
+
 
 @app.route('/api/space-traffic-graph')
 def space_traffic_graph():
     G = nx.Graph()
 
     # Load satellite and debris data (you can adjust the limits)
-    satellites = load_tle_objects('cached_active.tle', limit=100)
-    debris = load_tle_objects('cached_debris.tle', limit=100)
+    satellites = get_tle_objects('cached_active.tle', limit=100)
+    debris = get_tle_objects('cached_debris.tle', limit=100)
     all_objects = satellites + debris
 
-    # Add nodes to graph
-    for obj in all_objects:
-        semi_major_axis_km = obj['sat'].model.a * 6378.137  # compute semi-major axis in km
-        orbit_zone = classify_orbit(semi_major_axis_km - 6371)
-        t = ts.now()
-        geocentric = obj['sat'].at(t)
-        x, y, z = geocentric.position.km
-
-        G.add_node(
-            obj['id'],
-            name=obj['name'],
-            type=obj['type'],
-            orbit_zone=orbit_zone,
-            risk_factor=calculate_collision_risk(x, y, z, semi_major_axis_km),
-            semi_major_axis=semi_major_axis_km
+    # Propagate every node in one batched C++ call and derive zone and
+    # risk as vectorized passes, instead of a Skyfield .at() per node
+    node_ids = []
+    positions = None
+    if all_objects:
+        satrecs = [obj['sat'].model for obj in all_objects]
+        jd, fr = jday_now()
+        errors, pos, vel = propagate_satrecs(satrecs, jd, fr)
+
+        semi_major_axes = np.array([s.a for s in satrecs]) * _EARTH_EQ_RADIUS_KM  # km
+        orbit_zones = classify_orbit_array(semi_major_axes - _EARTH_RADIUS_KM)
+        risks = calculate_collision_risk_array(pos)
+
+        G.add_nodes_from(
+            (obj['id'], {
+                'name': obj['name'],
+                'type': obj['type'],
+                'orbit_zone': zone,
+                'risk_factor': risk,
+                'semi_major_axis': sma,
+            })
+            for obj, zone, risk, sma in zip(all_objects, orbit_zones.tolist(),
+                                            risks.tolist(), semi_major_axes.tolist())
         )
 
+        # Keep only cleanly propagated positions for the proximity pass
+        valid = errors == 0
+        node_ids = [all_objects[k]['id'] for k in np.nonzero(valid)[0]]
+        positions = pos[valid]
+
     # Add edges from known conjunctions
     conjunctions = get_detected_conjunctions(past_days=7)
     for conj in conjunctions:
@@ -722,17 +1229,19 @@ def space_traffic_graph():
             risk=conj.probability
         )
 
-    # Optional: add edges for satellites in the same orbital shell (clustering)
-    orbit_zone_groups = {}
-    for node_id, attrs in G.nodes(data=True):
-        zone = attrs['orbit_zone']
-        orbit_zone_groups.setdefault(zone, []).append(node_id)
-
-    for group in orbit_zone_groups.values():
-        for i in range(len(group)):
-            for j in range(i + 1, len(group)):
-                if not G.has_edge(group[i], group[j]):
-                    G.add_edge(group[i], group[j], weight=9999, note='same_orbit_cluster')
+    # Optional: add edges for objects that are actually close in space.
+    # A KD-tree radius query replaces the old same-orbit-zone pairing,
+    # which emitted O(N^2) placeholder edges per zone; now only
+    # geometrically nearby pairs get an edge, weighted by real distance.
+    if positions is not None and len(positions):
+        pts = positions
+        pairs = cKDTree(pts).query_pairs(r=CLUSTER_RADIUS_KM, output_type='ndarray')
+        if len(pairs):
+            dists = np.linalg.norm(pts[pairs[:, 0]] - pts[pairs[:, 1]], axis=1)
+            for (i, j), dist in zip(pairs.tolist(), dists.tolist()):
+                if not G.has_edge(node_ids[i], node_ids[j]):
+                    G.add_edge(node_ids[i], node_ids[j], weight=dist,
+                               note='same_orbit_cluster')
 
     # Build JSON payload
     graph_data = {
@@ -760,9 +1269,14 @@ def space_traffic_graph():
         ]
     }
 
-    return jsonify(graph_data)
+    return orjson_response(graph_data)
 
 
+# Production serving goes through gunicorn (threaded workers share one
+# cached TLE snapshot each and Redis shares responses across them):
+#   gunicorn -w 4 --threads 4 -k gthread app:app
+# Running app.py directly stays a development convenience, with the
+# reloader/debugger only when explicitly asked for via FLASK_DEBUG=1.
 if __name__ == '__main__':
     create_database()
-    app.run(debug=True)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1')
@@ -1,27 +1,113 @@
 from app import celery
 import requests
-from app import app,db
+from app import app, db, build_orbital_elements_payload, run_conjunction_simulation, ORBITAL_ELEMENTS_GZ, TLE_REDIS_KEYS
 from models import Conjunction, ManeuverPlan
 from datetime import datetime, timedelta
+import gzip
 import math
-from helper_functions import load_tle_objects, simulate_closest_approach, estimate_probability, classify_orbit_zone, compute_maneuver_for_conjunction
+import os
+import time
+import numpy as np
+import orjson
+import redis
+from sgp4.api import SatrecArray, jday
+from helper_functions import load_tle_objects, estimate_probability, classify_orbit_zone, compute_maneuver_for_conjunction
 from celery import shared_task
 
+# Reuse one session for all Celestrak fetches: keeps the TCP/TLS
+# connection alive between tasks and asks for gzip (~4x smaller payload)
+_SESSION = requests.Session()
+_SESSION.headers['Accept-Encoding'] = 'gzip'
+
+# Validators (Last-Modified/ETag) from the previous fetch per URL, so the
+# 6-hourly refresh issues conditional GETs and skips the multi-MB body
+# whenever CelesTrak reports the catalog unchanged
+_TLE_FETCH_META = {}
+
+_EARTH_EQ_RADIUS_KM = 6378.137  # sgp4's satrec.a is in Earth radii
+
+def _fetch_tle_to_file(tle_url, output_file):
+    """Conditionally GET a TLE URL, streaming straight to disk.
+
+    The body streams into output_file + '.tmp' in 64 KiB chunks — the
+    multi-megabyte catalog never sits in memory whole — and is moved
+    into place atomically, so an HTTP worker can never read a
+    half-written file. Returns False when the server answered
+    304 Not Modified (the existing file is still current).
+    """
+    headers = {}
+    meta = _TLE_FETCH_META.get(tle_url)
+    if meta:
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+
+    tmp_file = output_file + '.tmp'
+    with _SESSION.get(tle_url, headers=headers, stream=True, timeout=10) as response:
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+
+        with open(tmp_file, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=65536):
+                f.write(chunk)
+
+        _TLE_FETCH_META[tle_url] = {
+            'last_modified': response.headers.get('Last-Modified'),
+            'etag': response.headers.get('ETag'),
+        }
+
+    os.replace(tmp_file, output_file)
+    return True
+
+_REDIS = redis.Redis.from_url('redis://localhost:6379/0')
+
+def _mirror_tle_to_redis(output_file, content):
+    """Mirror the raw TLE bytes into Redis so API workers that don't
+    share this filesystem can still serve (app.get_parsed_tle falls back
+    to these keys when the local file is missing)."""
+    key = TLE_REDIS_KEYS.get(output_file)
+    if key is None:
+        return
+    try:
+        pipe = _REDIS.pipeline()
+        pipe.setex(key, 86400, content)
+        pipe.setex(key + ':mtime', 86400, str(time.time()))
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"[WARN] Could not mirror {output_file} to Redis: {e}")
+
 @celery.task
 def fetch_tle_satellite():
     tle_url = 'https://celestrak.org/NORAD/elements/gp.php?GROUP=active&FORMAT=tle'
     output_file = 'cached_active.tle'
     
     try:
-        response = requests.get(tle_url, timeout=10)
-        response.raise_for_status()
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(response.text)
-        
+        if not _fetch_tle_to_file(tle_url, output_file):
+            print(f"[INFO] Active satellites TLE unchanged upstream; keeping {output_file}")
+            return
+
+        with open(output_file, 'rb') as f:
+            _mirror_tle_to_redis(output_file, f.read())
+
         print(f"[SUCCESS] TLE data for active satellites saved to {output_file}")
     except Exception as e:
         print(f"[ERROR] Failed to fetch active satellites TLE data: {e}")
+        return
+
+    # Precompute the orbital-elements response here, once per refresh, so
+    # the API can serve a static gzipped artifact instead of recomputing.
+    # Write to a temp file and rename so readers never see a partial file.
+    try:
+        payload = build_orbital_elements_payload(output_file)
+        tmp_file = ORBITAL_ELEMENTS_GZ + '.tmp'
+        with gzip.open(tmp_file, 'wb') as f:
+            f.write(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY))
+        os.replace(tmp_file, ORBITAL_ELEMENTS_GZ)
+        print(f"[SUCCESS] Precomputed orbital elements saved to {ORBITAL_ELEMENTS_GZ}")
+    except Exception as e:
+        print(f"[ERROR] Failed to precompute orbital elements: {e}")
 
 @celery.task
 def fetch_tle_debris():
@@ -29,57 +115,167 @@ def fetch_tle_debris():
     output_file = 'cached_debris.tle'
     
     try:
-        response = requests.get(tle_url, timeout=10)
-        response.raise_for_status()
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(response.text)
-        
+        if not _fetch_tle_to_file(tle_url, output_file):
+            print(f"[INFO] IRIDIUM-33 debris TLE unchanged upstream; keeping {output_file}")
+            return
+
+        with open(output_file, 'rb') as f:
+            _mirror_tle_to_redis(output_file, f.read())
+
         print(f"[SUCCESS] TLE data for IRIDIUM-33 debris saved to {output_file}")
     except Exception as e:
         print(f"[ERROR] Failed to fetch IRIDIUM-33 debris TLE data: {e}")
 
 
+@celery.task
+def run_conjunction_simulation_task(params):
+    """Async variant of /api/simulate-conjunction.
+
+    The endpoint dispatches this by name and the client polls
+    /api/simulate-conjunction/<task_id> for the result, so long screens
+    don't hold an HTTP worker for their whole runtime.
+    """
+    payload, status = run_conjunction_simulation(params)
+    if status != 200:
+        raise RuntimeError(payload.get('error', 'conjunction simulation failed'))
+    return payload
+
+
 @celery.task
 def detect_global_conjunctions():
 
     now = datetime.utcnow()
-    end_time = now + timedelta(days=7)
+    coarse_step_minutes = 30
+    fine_step_minutes = 1
+    n_steps = 7 * 24 * 60 // coarse_step_minutes + 1  # 7-day window
+    threshold_km = 100.0  # can adjust
 
     # Load first N satellites and debris (example: first 20 each)
     satellites = load_tle_objects('cached_active.tle', limit=20)
     debris = load_tle_objects('cached_debris.tle', limit=20)
     all_objects = satellites + debris
-    
+    if not all_objects:
+        return
+
+    # Propagate every object at every timestep in one vectorized C++
+    # call instead of marching each of the N(N-1)/2 pairs through its
+    # own Python time loop (which re-ran SGP4 per pair, not per object)
+    satrecs = [obj['sat'].model for obj in all_objects]
+    jd0, fr0 = jday(now.year, now.month, now.day, now.hour, now.minute,
+                    now.second + now.microsecond * 1e-6)
+    jd = np.full(n_steps, jd0)
+    fr = fr0 + np.arange(n_steps) * (coarse_step_minutes * 60.0 / 86400.0)
+    errors, r, v = SatrecArray(satrecs).sgp4(jd, fr)
+
+    # Failed propagations become NaN so they can never win a minimum
+    r[errors != 0] = np.nan
+
+    # Distance search over the unique pairs only (upper triangle), and
+    # chunked along the time axis so the (pairs, chunk, 3) difference
+    # tensor stays cache-sized; the einsum reduction runs the whole
+    # inner loop in C, so the Python level only sees ~T/chunk iterations
+    n_objects = len(all_objects)
+    iu, ju = np.triu_indices(n_objects, 1)
+
+    # Orbital-shell screen: a pair whose radial shells [r_peri, r_apo]
+    # miss each other by more than the threshold can never close within
+    # it, so those pairs are dropped before the distance search. Mixed
+    # LEO/MEO/GEO catalogs shed most of the N(N-1)/2 pairs here.
+    a_km = np.array([s.a for s in satrecs]) * _EARTH_EQ_RADIUS_KM
+    ecc = np.array([s.ecco for s in satrecs])
+    r_peri = a_km * (1.0 - ecc)
+    r_apo = a_km * (1.0 + ecc)
+    overlap = ((r_peri[iu] <= r_apo[ju] + threshold_km)
+               & (r_peri[ju] <= r_apo[iu] + threshold_km))
+    iu, ju = iu[overlap], ju[overlap]
+    n_pairs = len(iu)
+    min_d2 = np.full(n_pairs, np.inf)
+    argmin_t = np.zeros(n_pairs, dtype=np.int64)
+    t_chunk = 128
+    # The pair axis is partitioned too, so the working set stays bounded
+    # by (p_chunk, t_chunk, 3) no matter how large the catalog grows;
+    # each morsel of pairs runs the full time sweep independently
+    p_chunk = 65536
+    for p0 in range(0, n_pairs, p_chunk):
+        sl = slice(p0, min(p0 + p_chunk, n_pairs))
+        iu_m, ju_m = iu[sl], ju[sl]
+        rows_idx = np.arange(len(iu_m))
+        for t0 in range(0, n_steps, t_chunk):
+            diff = r[iu_m, t0:t0 + t_chunk] - r[ju_m, t0:t0 + t_chunk]
+            d2 = np.einsum('ptk,ptk->pt', diff, diff)
+            np.nan_to_num(d2, copy=False, nan=np.inf)
+            chunk_arg = d2.argmin(axis=1)
+            chunk_min = d2[rows_idx, chunk_arg]
+            closer = chunk_min < min_d2[sl]
+            min_d2[sl] = np.where(closer, chunk_min, min_d2[sl])
+            argmin_t[sl] = np.where(closer, t0 + chunk_arg, argmin_t[sl])
+
+    # Coarse-to-fine: the 30-minute grid above only locates the
+    # neighborhood of each pair's closest approach; candidate pairs get
+    # a 1-minute refinement over the bracketing coarse interval, which
+    # is both finer and far cheaper than marching every pair at high
+    # resolution. The gate is derived from the coarse pass itself:
+    # between coarse samples a pair can close by at most its relative
+    # speed times half the sample spacing, so anything whose coarse
+    # minimum exceeds threshold + that margin provably cannot cross
+    # the threshold — unlike a fixed multiple, this cannot miss
+    # fast-crossing pairs.
+    rel_v = v[iu, argmin_t] - v[ju, argmin_t]
+    rel_speed = np.sqrt(np.einsum('pk,pk->p', rel_v, rel_v))
+    gate_km = threshold_km + rel_speed * (coarse_step_minutes * 60.0 / 2.0)
+
+    # Buffer plain dicts and insert them with one executemany at the
+    # end, instead of a unit-of-work flush per detected conjunction
+    rows = []
+    for p in np.nonzero(min_d2 < gate_km * gate_km)[0]:
+        i, j = int(iu[p]), int(ju[p])
+        t_coarse = int(argmin_t[p])
+
+        lo = max(t_coarse - 1, 0) * coarse_step_minutes
+        hi = min(t_coarse + 1, n_steps - 1) * coarse_step_minutes
+        minutes = np.arange(lo, hi + fine_step_minutes, fine_step_minutes)
+        jd_f = np.full(len(minutes), jd0)
+        fr_f = fr0 + minutes * (60.0 / 86400.0)
+        errs_f, r_f, v_f = SatrecArray([satrecs[i], satrecs[j]]).sgp4(jd_f, fr_f)
+
+        diff_f = r_f[0] - r_f[1]
+        d2_f = np.einsum('tk,tk->t', diff_f, diff_f)
+        d2_f[(errs_f[0] != 0) | (errs_f[1] != 0)] = np.inf
+        m = int(d2_f.argmin())
+        if not d2_f[m] < threshold_km * threshold_km:
+            continue
+
+        obj1 = all_objects[i]
+        obj2 = all_objects[j]
+        min_dist = math.sqrt(d2_f[m])
+        conj_time = now + timedelta(minutes=float(minutes[m]))
+        v1 = float(np.linalg.norm(v_f[0, m]))
+        v2 = float(np.linalg.norm(v_f[1, m]))
+        rel_vel = float(np.linalg.norm(v_f[0, m] - v_f[1, m]))
+
+        rows.append({
+            'object1_id': obj1['id'],
+            'object1_name': obj1['name'],
+            'object1_type': obj1['type'],
+            'object1_satnum': obj1['satnum'],
+            'object2_id': obj2['id'],
+            'object2_name': obj2['name'],
+            'object2_type': obj2['type'],
+            'object2_satnum': obj2['satnum'],
+            'detected_at': now,
+            'conjunction_time': conj_time,
+            'closest_distance_km': min_dist,
+            'object1_velocity_km_s': v1,
+            'object2_velocity_km_s': v2,
+            'relative_velocity_km_s': rel_vel,
+            'probability': estimate_probability(min_dist, rel_vel),
+            'orbit_zone': classify_orbit_zone(obj1, obj2),
+            'notes': None,
+        })
+
     with app.app_context():
-        for i in range(len(all_objects)):
-            for j in range(i + 1, len(all_objects)):
-                obj1 = all_objects[i]
-                obj2 = all_objects[j]
-
-                min_dist, conj_time, v1, v2, rel_vel = simulate_closest_approach(obj1, obj2, now, end_time)
-
-                if min_dist < 100:  # Threshold km, can adjust
-                    conjunction = Conjunction(
-                        object1_id=obj1['id'],
-                        object1_name=obj1['name'],
-                        object1_type=obj1['type'],
-                        object1_satnum=obj1['satnum'],
-                        object2_id=obj2['id'],
-                        object2_name=obj2['name'],
-                        object2_type=obj2['type'],
-                        object2_satnum=obj2['satnum'],
-                        detected_at=now,
-                        conjunction_time=conj_time,
-                        closest_distance_km=min_dist,
-                        object1_velocity_km_s=v1,
-                        object2_velocity_km_s=v2,
-                        relative_velocity_km_s=rel_vel,
-                        probability=estimate_probability(min_dist, rel_vel),
-                        orbit_zone=classify_orbit_zone(obj1, obj2),
-                        notes=None
-                    )
-                    db.session.add(conjunction)
+        if rows:
+            db.session.execute(db.insert(Conjunction), rows)
         db.session.commit()
 
 @shared_task
@@ -90,11 +286,10 @@ def run_maneuver_planning():
             db.func.date(Conjunction.detected_at) == today
         ).all()
 
-        count = 0
-        for conjunction in conjunctions_today:
-            plan = compute_maneuver_for_conjunction(conjunction)
-            if plan:
-                db.session.add(plan)
-                count += 1
+        # Collect the plans and hand them to the session in one call;
+        # the Conjunction rows were already batch-inserted the same way
+        plans = [plan for conjunction in conjunctions_today
+                 if (plan := compute_maneuver_for_conjunction(conjunction))]
+        db.session.add_all(plans)
         db.session.commit()
-        print(f"Maneuver planning completed for {count} conjunctions.")
\ No newline at end of file
+        print(f"Maneuver planning completed for {len(plans)} conjunctions.")
\ No newline at end of file
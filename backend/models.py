@@ -13,7 +13,7 @@ class Conjunction(db.Model):
     object2_name = db.Column(db.String)
     object2_type = db.Column(db.String)
     object2_satnum = db.Column(db.Integer)
-    detected_at = db.Column(db.DateTime)
+    detected_at = db.Column(db.DateTime, index=True)
     conjunction_time = db.Column(db.DateTime)
     closest_distance_km = db.Column(db.Float)
     object1_velocity_km_s = db.Column(db.Float)
@@ -23,6 +23,17 @@ class Conjunction(db.Model):
     orbit_zone = db.Column(db.String)
     notes = db.Column(db.String)
 
+    # Expression index so the daily_conjunctions date(detected_at) filter
+    # can seek instead of scanning the whole table; the composite indexes
+    # back the per-object upcoming/history lookups (each side of their
+    # UNION ALL hits one index and comes back pre-sorted by time)
+    __table_args__ = (
+        db.Index('ix_conj_detected_date', db.func.date(detected_at)),
+        db.Index('ix_conj_obj1_time', object1_id, conjunction_time),
+        db.Index('ix_conj_obj2_time', object2_id, conjunction_time),
+        db.Index('ix_conj_pair_time', object1_satnum, object2_satnum, conjunction_time),
+    )
+
 class ManeuverPlan(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     conjunction_id = db.Column(db.Integer, db.ForeignKey('conjunction.id'), nullable=False)
@@ -36,15 +47,17 @@ class ManeuverPlan(db.Model):
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def to_dict(self):
+        # Datetimes stay raw: orjson serializes them natively in C to
+        # the same ISO 8601 text, skipping two Python calls per row
         return {
             'id': self.id,
             'conjunction_id': self.conjunction_id,
             'object_id': self.object_id,
             'maneuver_type': self.maneuver_type,
             'delta_v': self.delta_v,
-            'execution_time': self.execution_time.isoformat(),
+            'execution_time': self.execution_time,
             'expected_miss_distance': self.expected_miss_distance,
             'fuel_cost': self.fuel_cost,
             'risk_reduction': self.risk_reduction,
-            'generated_at': self.generated_at.isoformat()
+            'generated_at': self.generated_at
         }
\ No newline at end of file